@@ -149,14 +149,13 @@ def convert_dataframe_to_knime_friendly_dict(df):
     """Produces a dict from a pandas DataFrame-like input that is structured
     to be friendly to KNIME when converted to then consumed as json.
 
-    Known issue:  Uses pandas.DataFrame.to_dict(orient="split") which will
-    make use of the values array rather than individual Series and as such
-    may cause "upcasting" of certain columns' data.  An example of this
-    would be a DataFrame containing only int64 and float64 columns.  The
-    output from to_dict(orient="split") will be a list of lists of float.
-    If upcasting is not possible, say in the same example a column is added
-    containing str's, then to_dict() will treat all as Python objects and
-    thus output a list of lists of int, float, str as appropriate.
+    Each column is converted to Python objects on its own (rather than via
+    the DataFrame's combined values array) so that, for example, int64
+    columns are not "upcast" to float just because a float64 column is
+    also present.  Missing values in columns of a numeric or boolean KNIME
+    type become None and thus null in the final json.  Columns conveyed to
+    KNIME as 'string' are converted value by value with str(), so their
+    missing values arrive as text such as "nan" or "NaT".
     """
 
     proto_table_spec = [
@@ -165,19 +164,27 @@ def convert_dataframe_to_knime_friendly_dict(df):
     ]
 
     # If an encountered column's dtype does not readily map to a KNIME
-    # data type, it will be conveyed to KNIME as a 'string'.  To ensure
-    # proper conversion to json, a copy of the original DataFrame is
-    # created, containing str values in otherwise problematic columns.
-    df2 = df.copy()
-    for column_name, knime_type in proto_table_spec:
+    # data type, it will be conveyed to KNIME as a 'string'.  Each column
+    # becomes a list of Python objects from which the rows are assembled,
+    # avoiding a round trip of the whole table through json text.
+    columns = []
+    for (_, knime_type), (_, column) in zip(
+        proto_table_spec, df.items()
+    ):
         if knime_type == "string":
-            df2[column_name] = df2[column_name].apply(str)
-
-    if df2.isna().any().any():
-        # If any NaN values exist, ensure they convert to null in final json.
-        cleaned_table_data = json.loads(df2.to_json(orient="values"))
-    else:
-        cleaned_table_data = df2.to_dict(orient="split")["data"]
+            values = column.map(str).tolist()
+        else:
+            values = column.tolist()
+            missing_values = column.isna()
+            if missing_values.any():
+                # Ensure NaN values convert to null in final json.
+                values = [
+                    None if is_missing else value
+                    for value, is_missing in zip(values, missing_values)
+                ]
+        columns.append(values)
+
+    cleaned_table_data = [list(row) for row in zip(*columns)]
     data = {
         "table-spec": [ {c: t} for c, t in proto_table_spec ],
         "table-data": cleaned_table_data,
@@ -186,6 +193,18 @@ def convert_dataframe_to_knime_friendly_dict(df):
     return data
 
 
+def convert_knime_friendly_dict_to_dataframe(data):
+    """Produces a pandas DataFrame from a dict structured the way KNIME's
+    Container Output (Table) nodes produce it (once loaded from json)."""
+    import pandas as pd
+
+    df_columns = list(
+        k for d in data['table-spec']
+        for k, v in d.items()
+    )
+    return pd.DataFrame(data['table-data'], columns=df_columns)
+
+
 def run_workflow_using_multiple_service_tables(
         input_datas,
         path_to_knime_executable,
@@ -225,8 +244,10 @@ def run_workflow_using_multiple_service_tables(
             except AttributeError:
                 pass
 
+            # Compact separators keep large tables' files (which KNIME must
+            # read back in full) as small as the json format allows.
             with open(input_json_filepath, "w") as input_json_fh:
-                json.dump(data, input_json_fh)
+                json.dump(data, input_json_fh, separators=(",", ":"))
 
             option_flags_input_service_table_nodes.append(
                 f'-option={node_id},inputPathOrUrl,"{input_json_filepath}",String'
@@ -289,16 +310,9 @@ def run_workflow_using_multiple_service_tables(
 
         if output_as_pandas_dataframes:
             try:
-                import pandas as pd
                 for i, output in enumerate(knime_outputs):
-                    df_columns = list(
-                        k for d in output['table-spec']
-                        for k, v in d.items()
-                    )
-                    knime_outputs[i] = pd.DataFrame(
-                        output['table-data'],
-                        columns=df_columns
-                    )
+                    knime_outputs[i] = \
+                        convert_knime_friendly_dict_to_dataframe(output)
             except ImportError:
                 logging.warning("requested output as DataFrame not possible")
             except Exception as e:
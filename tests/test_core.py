@@ -1,8 +1,10 @@
-import io
 import hashlib
 import logging
 import os
+from pathlib import Path
+import shutil
 import sys
+import tempfile
 import threading
 import time
 import unittest
@@ -18,7 +20,31 @@ import knime
 del sys.path[0]
 
 
+TEST_WORKSPACE_PATH = Path(__file__).resolve().parent / "knime-workspace"
+KNIME_LOCK_FILENAME = ".knimeLock"
+# Only reached on failure; generous to allow for a cold KNIME start on CI.
+LOCK_WAIT_TIMEOUT_SECONDS = 120
+
+
+def md5_hexdigest_of_file(filepath):
+    "Returns the MD5 hex digest of a file's contents, read as raw bytes."
+    with open(filepath, "rb") as fp:
+        if hasattr(hashlib, "file_digest"):  # Python 3.11+
+            return hashlib.file_digest(fp, "md5").hexdigest()
+        md5 = hashlib.md5()
+        buffer = memoryview(bytearray(65536))
+        num_bytes_read = fp.readinto(buffer)
+        while num_bytes_read:
+            md5.update(buffer[:num_bytes_read])
+            num_bytes_read = fp.readinto(buffer)
+        return md5.hexdigest()
+
+
 class CoreFunctionsTest(unittest.TestCase):
+    """Each test running KNIME uses its own copy of the test workspace so
+    that tests neither depend on the order they are run in nor collide on
+    KNIME's workflow lock when run in parallel (e.g. `pytest -n auto`)."""
+
     default_container_input_table_columns = [
         "column-string",
         "column-int",
@@ -35,12 +61,51 @@ class CoreFunctionsTest(unittest.TestCase):
         "table-data": [[100, "boil"], [0, "freeze"]]
     }
 
+    # Populated on first use by no_input_data_results().
+    _no_input_data_results = None
+
+    def setUp(self):
+        self._workspace_path = None
+
+    @property
+    def workspace_path(self):
+        """Path to this test's private copy of the test workspace, copied
+        on first use so that tests never running KNIME skip the copy."""
+        if self._workspace_path is None:
+            temp_dir = tempfile.TemporaryDirectory()
+            self.addCleanup(temp_dir.cleanup)
+            workspace_path = Path(temp_dir.name, "knime-workspace")
+            shutil.copytree(TEST_WORKSPACE_PATH, workspace_path)
+            self._workspace_path = workspace_path
+        return self._workspace_path
+
+    @property
+    def workflow_path(self):
+        return str(self.workspace_path / "test_simple_container_table_01")
+
     @staticmethod
+    def make_input_dataframe(
+            column_int_values=(0, 15, 30),
+            with_missing_values=True
+        ):
+        """Builds the DataFrame input used by the DataFrame tests, creating
+        each column directly in its intended dtype."""
+        columns = {
+            "column-int": np.array(column_int_values, dtype=np.int32),
+            "description": np.array(["cold", "warm", "hot"], dtype=object),
+        }
+        if with_missing_values:
+            columns["showcase_missing_val"] = np.array(
+                [3.14, np.nan, -1.0], dtype=np.float64
+            )
+        return pd.DataFrame(columns)
+
     def templated_test_container_1_input_1_output(
+            self,
             input_data_table=None,
             output_as_pandas_dataframes=None
         ):
-        with knime.Workflow("tests/knime-workspace/test_simple_container_table_01") as wf:
+        with knime.Workflow(self.workflow_path) as wf:
             if input_data_table is not None:
                 wf.data_table_inputs[0] = input_data_table
             if output_as_pandas_dataframes is not None:
@@ -79,6 +144,9 @@ class CoreFunctionsTest(unittest.TestCase):
 
 
     def test_workflow_locked_by_other_instance(self):
+        # Copy the workspace before starting the other thread so that both
+        # threads run the same copy of the workflow.
+        lock_filepath = Path(self.workflow_path, KNIME_LOCK_FILENAME)
         t = threading.Thread(
             target=self.templated_test_container_1_input_1_output,
             kwargs=dict(
@@ -86,7 +154,17 @@ class CoreFunctionsTest(unittest.TestCase):
             )
         )
         t.start()
-        time.sleep(2)  # Ensure time for other thread to start
+        # Joined before the workspace copy is removed, even on failure.
+        self.addCleanup(t.join)
+        # Proceed as soon as the other thread's KNIME instance holds the lock.
+        deadline = time.monotonic() + LOCK_WAIT_TIMEOUT_SECONDS
+        while not lock_filepath.exists():
+            self.assertTrue(t.is_alive(), "other KNIME instance already exited")
+            self.assertLess(
+                time.monotonic(), deadline,
+                "timed out waiting for other KNIME instance to lock workflow"
+            )
+            time.sleep(0.005)
         with self.assertRaises(ChildProcessError) as cm:
             results = self.templated_test_container_1_input_1_output(
                 input_data_table=self.simple_input_data_table_dict,
@@ -95,12 +173,10 @@ class CoreFunctionsTest(unittest.TestCase):
             cm.exception.args[0],
             knime.KEYPHRASE_LOCKED.decode('utf8')
         )
-        t.join()
 
 
+    @unittest.skipIf(pd is None, "pandas not available")
     def test_container_1_input_1_output_dict_input_with_pandas(self):
-        if pd is None:
-            self.skipTest("pandas not available")
         results = self.templated_test_container_1_input_1_output(
             input_data_table=self.simple_input_data_table_dict,
             output_as_pandas_dataframes=True,
@@ -114,14 +190,9 @@ class CoreFunctionsTest(unittest.TestCase):
         )
 
 
+    @unittest.skipIf(pd is None, "pandas not available")
     def test_container_1_input_1_output_DataFrame_input(self):
-        if pd is None:
-            self.skipTest("pandas not available")
-        df = pd.DataFrame(
-            [[0, "cold", 3.14], [15, "warm", np.NaN], [30, "hot", -1.0]],
-            columns=["column-int", "description", "showcase_missing_val"]
-        )
-        df["column-int"] = df["column-int"].astype(np.int32)
+        df = self.make_input_dataframe()
         results = self.templated_test_container_1_input_1_output(
             input_data_table=df,
         )
@@ -139,14 +210,50 @@ class CoreFunctionsTest(unittest.TestCase):
         self.assertTrue(results[0]["showcase_missing_val"].isna().any())
 
 
+    @unittest.skipIf(pd is None, "pandas not available")
+    def test_convert_dataframe_to_knime_friendly_dict(self):
+        df = self.make_input_dataframe()
+        original_df = df.copy()
+        data = knime.convert_dataframe_to_knime_friendly_dict(df)
+        self.assertEqual(
+            data["table-spec"],
+            [
+                {"column-int": "int"},
+                {"description": "string"},
+                {"showcase_missing_val": "double"},
+            ]
+        )
+        self.assertEqual(
+            data["table-data"],
+            [[0, "cold", 3.14], [15, "warm", None], [30, "hot", -1.0]]
+        )
+        self.assertEqual(
+            [type(v) for v in data["table-data"][0]],
+            [int, str, float]
+        )
+        # Input DataFrame must be left untouched by the conversion.
+        pd.testing.assert_frame_equal(df, original_df)
+
+        # Missing values in 'string' columns are converted with str().
+        df = pd.DataFrame({
+            "column-localdate": pd.to_datetime(
+                pd.Series(["2020-01-01", None])
+            ),
+        })
+        data = knime.convert_dataframe_to_knime_friendly_dict(df)
+        self.assertEqual(data["table-spec"], [{"column-localdate": "string"}])
+        self.assertEqual(
+            data["table-data"],
+            [["2020-01-01 00:00:00"], ["NaT"]]
+        )
+
+
+    @unittest.skipIf(pd is None, "pandas not available")
     def test_container_1_input_1_output_DataFrame_input_no_DataFrame_output(self):
-        if pd is None:
-            self.skipTest("pandas not available")
-        df = pd.DataFrame(
-            [[-1, "cold"], [15, "warm"], [30, "hot"]],
-            columns=["column-int", "description"]
+        df = self.make_input_dataframe(
+            column_int_values=[-1, 15, 30],
+            with_missing_values=False,
         )
-        df["column-int"] = df["column-int"].astype(np.int32)
         results = self.templated_test_container_1_input_1_output(
             input_data_table=df,
             output_as_pandas_dataframes=False,
@@ -164,11 +271,29 @@ class CoreFunctionsTest(unittest.TestCase):
         self.assertEqual(returned_computored_values, [-42, 630, 1260])
 
 
+    def no_input_data_results(self):
+        """Executes the workflow without any input data only once for all
+        tests needing its dict output, returning those results plus the
+        warnings issued during that execution."""
+        cls = type(self)
+        if cls._no_input_data_results is None:
+            with warnings.catch_warnings(record=True) as caught_warnings:
+                warnings.simplefilter("always")
+                results = self.templated_test_container_1_input_1_output(
+                    output_as_pandas_dataframes=False,
+                )
+            cls._no_input_data_results = results, caught_warnings
+        return cls._no_input_data_results
+
+    def assertNoInputDataWarned(self, caught_warnings):
+        self.assertTrue(
+            any(issubclass(w.category, UserWarning) for w in caught_warnings)
+        )
+
+
     def test_container_1_input_1_output_no_input_data_without_pandas(self):
-        with self.assertWarns(UserWarning):
-            results = self.templated_test_container_1_input_1_output(
-                output_as_pandas_dataframes=False,
-            )
+        results, caught_warnings = self.no_input_data_results()
+        self.assertNoInputDataWarned(caught_warnings)
         self.assertEqual(len(results), 1)
         self.assertTrue(isinstance(results[0], dict))
         returned_table_spec = (list(d)[0] for d in results[0]["table-spec"])
@@ -179,6 +304,8 @@ class CoreFunctionsTest(unittest.TestCase):
 
 
     def test_container_1_input_1_output_no_input_data(self):
+        # Runs the workflow itself (not via no_input_data_results) to verify
+        # the default output format of execute().
         with self.assertWarns(UserWarning):
             results = self.templated_test_container_1_input_1_output(
                 output_as_pandas_dataframes=None,
@@ -190,15 +317,12 @@ class CoreFunctionsTest(unittest.TestCase):
             self.assertTrue(isinstance(results[0], dict))
 
 
+    @unittest.skipIf(pd is None, "pandas not available")
     def test_container_1_input_1_output_no_input_data_with_pandas(self):
-        if pd is None:
-            self.skipTest("pandas not available")
-        with self.assertWarns(UserWarning):
-            results = self.templated_test_container_1_input_1_output(
-                output_as_pandas_dataframes=True,
-            )
+        results, caught_warnings = self.no_input_data_results()
+        self.assertNoInputDataWarned(caught_warnings)
         self.assertEqual(len(results), 1)
-        df = results[0]
+        df = knime.convert_knime_friendly_dict_to_dataframe(results[0])
         self.assertTrue(isinstance(df, pd.DataFrame))
         self.assertEqual(
             set(df.columns),
@@ -223,93 +347,69 @@ class CoreFunctionsTest(unittest.TestCase):
 
 
     def test_container_1_input_1_output_inappropriate_input_data(self):
-        logger = logging.getLogger()
-
-        # Remove current log handlers.
-        logging_handlers = logger.handlers[:]
-        for lh in logging_handlers:
-            logger.removeHandler(lh)
-
-        # Add our own temporary log handler.
-        log_buffer = io.StringIO()
-        temp_lh = logging.StreamHandler(log_buffer)
-        logger.addHandler(temp_lh)
-
         inappropriate_input_data_table_dict = {
             "table-spec": [{"columnZZZint": "int"}, {"bZZZ": "string"}],
             "table-data": [[101, "boil"], [-10, "freeze"]]
         }
 
-        with self.assertRaises(ChildProcessError):
-            results = self.templated_test_container_1_input_1_output(
-                input_data_table=inappropriate_input_data_table_dict,
-                output_as_pandas_dataframes=False,
-            )
-
-        log_buffer.seek(0)
-        raw_log_lines = log_buffer.readlines()
-
-        # Restore original log handlers.
-        logger.removeHandler(temp_lh)
-        for lh in logging_handlers:
-            logger.addHandler(lh)
+        with self.assertLogs(level=logging.ERROR) as cm:
+            with self.assertRaises(ChildProcessError):
+                results = self.templated_test_container_1_input_1_output(
+                    input_data_table=inappropriate_input_data_table_dict,
+                    output_as_pandas_dataframes=False,
+                )
+        log_messages = [record.getMessage() for record in cm.records]
+        raw_log_lines = [
+            line for message in log_messages for line in message.splitlines()
+        ]
 
         # Verify relevant available info sent to logging.
-        self.assertTrue("captured stdout" in raw_log_lines[0])
+        self.assertTrue(log_messages[0].startswith("captured stdout"))
         self.assertTrue(
-            len(
-                list(
-                    l for l in raw_log_lines if l.startswith("captured stderr")
-                )
-            )
+            any(m.startswith("captured stderr") for m in log_messages)
         )
         self.assertTrue(len(raw_log_lines[0]) > 25)
         self.assertTrue(len(raw_log_lines) > 25)
 
 
     def test_container_1_input_1_output_mismatched_input_datatypes(self):
-        # Str in column meant for int and vice versa.
-        mismatched_types_input_data_table_dict_1 = {
-            "table-spec": [{"column-int": "int"}, {"b": "string"}],
-            "table-data": [["boil", 98.7], ["freeze", False]]
-        }
-        with self.assertLogs(level=logging.ERROR):
-            with self.assertRaises(ChildProcessError) as cm:
-                results = self.templated_test_container_1_input_1_output(
-                    input_data_table=mismatched_types_input_data_table_dict_1,
-                    output_as_pandas_dataframes=False,
-                )
-            # Verify this was not a consequence of a locked workflow conflict.
-            self.assertNotEqual(
-                cm.exception.args[0],
-                knime.KEYPHRASE_LOCKED.decode('utf8')
-            )
-
-        # Float in column meant for int also results in missing values.
-        mismatched_types_input_data_table_dict_2 = {
-            "table-spec": [{"column-int": "int"}, {"b": "string"}],
-            "table-data": [[100.567, "boil"], [0.123, "freeze"]]
-        }
-        with self.assertLogs(level=logging.ERROR):
-            with self.assertRaises(ChildProcessError) as cm:
-                results = self.templated_test_container_1_input_1_output(
-                    input_data_table=mismatched_types_input_data_table_dict_2,
-                    output_as_pandas_dataframes=False,
-                )
-            # Verify this was not a consequence of a locked workflow conflict.
-            self.assertNotEqual(
-                cm.exception.args[0],
-                knime.KEYPHRASE_LOCKED.decode('utf8')
-            )
+        mismatched_types_input_data_table_dicts = [
+            # Str in column meant for int and vice versa.
+            {
+                "table-spec": [{"column-int": "int"}, {"b": "string"}],
+                "table-data": [["boil", 98.7], ["freeze", False]]
+            },
+            # Float in column meant for int also results in missing values.
+            {
+                "table-spec": [{"column-int": "int"}, {"b": "string"}],
+                "table-data": [[100.567, "boil"], [0.123, "freeze"]]
+            },
+        ]
+        for input_data_table in mismatched_types_input_data_table_dicts:
+            with self.subTest(input_data_table=input_data_table):
+                with self.assertLogs(level=logging.ERROR):
+                    with self.assertRaises(ChildProcessError) as cm:
+                        results = self.templated_test_container_1_input_1_output(
+                            input_data_table=input_data_table,
+                            output_as_pandas_dataframes=False,
+                        )
+                    # Verify this was not a consequence of a locked workflow
+                    # conflict.
+                    self.assertNotEqual(
+                        cm.exception.args[0],
+                        knime.KEYPHRASE_LOCKED.decode('utf8')
+                    )
 
 
     def test_non_existent_workflow_execution(self):
-        with knime.Workflow("tests/knime-workspace/never_gonna_give_you_up") as wf:
+        with knime.Workflow(
+            str(self.workspace_path / "never_gonna_give_you_up")
+        ) as wf:
             pass  # There was no execute call and so no problem.
 
         with self.assertRaises(FileNotFoundError):
             with knime.Workflow(
-                workspace_path="tests/knime-workspace",
+                workspace_path=self.workspace_path,
                 workflow_path="never_gonna_let_you_down"
             ) as wf:
                 # Existence of workflow is only checked in execute().
@@ -320,7 +420,7 @@ class CoreFunctionsTest(unittest.TestCase):
 
     def test_specify_workspace_plus_workflow(self):
         with knime.Workflow(
-            workspace_path="tests/knime-workspace",
+            workspace_path=self.workspace_path,
             workflow_path="test_simple_container_table_01"
         ) as wf:
             with self.assertWarns(UserWarning):
@@ -329,7 +429,7 @@ class CoreFunctionsTest(unittest.TestCase):
         self.assertEqual(len(results), 1)
 
         with knime.Workflow(
-            workspace_path="tests/knime-workspace",
+            workspace_path=self.workspace_path,
             workflow_path="/test_simple_container_table_01"
         ) as wf:
             with self.assertWarns(UserWarning):
@@ -340,7 +440,7 @@ class CoreFunctionsTest(unittest.TestCase):
         with self.assertRaises(FileNotFoundError):
             # Non-existent workflow.
             with knime.Workflow(
-                workspace_path="tests/knime-workspace",
+                workspace_path=self.workspace_path,
                 workflow_path="never_gonna_run_around_and_desert_you"
             ) as wf:
                 with self.assertWarns(UserWarning):
@@ -358,28 +458,30 @@ class CoreFunctionsTest(unittest.TestCase):
                 results = wf.data_table_outputs[:]
 
 
-    def test_AAAA_nosave_workflow_after_execution_as_default(self):
-        with knime.Workflow("tests/knime-workspace/test_simple_container_table_01") as wf:
+    def test_nosave_workflow_after_execution_as_default(self):
+        with knime.Workflow(self.workflow_path) as wf:
             with self.assertWarns(UserWarning):
                 wf.execute(output_as_pandas_dataframes=False)
             results = wf.data_table_outputs[:]
             self.assertEqual(wf.data_table_inputs_parameter_names, ("input",))
 
-        with open(wf.path_to_knime_workflow / ".savedWithData") as fp:
-            contents_hash = hashlib.md5(fp.read().encode('utf8')).hexdigest()
+        contents_hash = md5_hexdigest_of_file(
+            wf.path_to_knime_workflow / ".savedWithData"
+        )
         self.assertEqual(contents_hash, "ac23b46d2e75be6a9ce5f479104de658")
 
 
-    def test_zzzz_save_workflow_after_execution(self):
-        with knime.Workflow("tests/knime-workspace/test_simple_container_table_01") as wf:
+    def test_save_workflow_after_execution(self):
+        with knime.Workflow(self.workflow_path) as wf:
             wf.save_after_execution = True
             with self.assertWarns(UserWarning):
                 wf.execute(output_as_pandas_dataframes=False)
             results = wf.data_table_outputs[:]
             self.assertEqual(wf.data_table_inputs_parameter_names, ("input",))
 
-        with open(wf.path_to_knime_workflow / ".savedWithData") as fp:
-            contents_hash = hashlib.md5(fp.read().encode('utf8')).hexdigest()
+        contents_hash = md5_hexdigest_of_file(
+            wf.path_to_knime_workflow / ".savedWithData"
+        )
         self.assertNotEqual(contents_hash, "ac23b46d2e75be6a9ce5f479104de658")
 
 